@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+"""
+This tool is for checking the security hardening options of the Linux kernel.
+
+SPDX-FileCopyrightText: Alexander Popov <alex.popov@linux.com>
+SPDX-License-Identifier: GPL-3.0-only
+
+This module creates an HTML report from the CSV summary of the kernel
+initialization hardening options prepared by kconfigs_init_parser.py.
+"""
+
+# pylint: disable=missing-function-docstring,line-too-long
+
+import os
+import sys
+import csv
+from argparse import ArgumentParser
+
+# the ignore keeps the bare-mypy CI run green, where jinja2 is not installed
+try:
+    from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache # type: ignore[import-not-found]
+except ImportError:
+    sys.exit('[-] ERROR: jinja2 is needed for creating the HTML report')
+
+
+TEMPLATE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_FILE = 'report_template.html'
+
+# the compiled template is cached for the process lifetime (and its bytecode
+# across processes), so create_html_from_csv() may be called in a loop
+# without re-parsing the template each time
+_ENV = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=True,
+                   auto_reload=False, cache_size=-1,
+                   bytecode_cache=FileSystemBytecodeCache())
+
+
+def create_html_from_csv(csv_file: str, output_file: str) -> None:
+    template = _ENV.get_template(TEMPLATE_FILE)
+
+    with open(csv_file, 'rt', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        try:
+            header = next(reader)
+        except StopIteration:
+            sys.exit(f'[-] ERROR: empty CSV file {csv_file}')
+        # the template iterates over the csv reader itself, so the rendered
+        # page streams to disk without building the whole table in memory
+        template.stream(header=header, table_rows=reader).dump(output_file, encoding='utf-8')
+    print(f'[+] Created the HTML report {output_file}')
+
+
+def main() -> None:
+    parser = ArgumentParser(prog='create_html',
+                            description='Create an HTML report from the CSV summary of the kernel initialization hardening options')
+    parser.add_argument('-c', '--csv', default='kconfigs_init.csv',
+                        help='CSV file with the parsing results')
+    parser.add_argument('-o', '--output', default='kconfigs_init.html',
+                        help='HTML file for the report')
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.csv):
+        sys.exit(f'[-] ERROR: no CSV file {args.csv}')
+    create_html_from_csv(args.csv, args.output)
+
+
+if __name__ == '__main__':
+    main()
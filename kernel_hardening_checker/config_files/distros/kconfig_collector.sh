@@ -0,0 +1,26 @@
+#!/bin/bash
+
+# Startup script for kernel_collection.py.
+# It runs inside the collection VM: uploads the kernel config and the system
+# info to the GCS bucket and reports completion via the instance metadata.
+
+set -x
+
+metadata_url="http://metadata.google.internal/computeMetadata/v1/instance"
+bucket_name=$(curl -s -H "Metadata-Flavor: Google" "${metadata_url}/attributes/bucket-name")
+image_name=$(curl -s -H "Metadata-Flavor: Google" "${metadata_url}/attributes/image-name")
+zone=$(curl -s -H "Metadata-Flavor: Google" "${metadata_url}/zone" | awk -F/ '{print $NF}')
+
+if [ -f /proc/config.gz ]; then
+    zcat /proc/config.gz > /tmp/kconfig
+else
+    cat "/boot/config-$(uname -r)" > /tmp/kconfig
+fi
+
+uname -a > /tmp/system_info.txt
+
+gsutil cp /tmp/kconfig "gs://${bucket_name}/${image_name}/${image_name}.config"
+gsutil cp /tmp/system_info.txt "gs://${bucket_name}/${image_name}/system_info.txt"
+
+gcloud compute instances add-metadata "$(hostname)" --zone="${zone}" \
+    --metadata=completion-status=success
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""
+This tool is for checking the security hardening options of the Linux kernel.
+
+SPDX-FileCopyrightText: Alexander Popov <alex.popov@linux.com>
+SPDX-License-Identifier: GPL-3.0-only
+
+This module parses the collected Kconfig files and creates a CSV summary
+of the kernel initialization hardening options.
+"""
+
+# pylint: disable=missing-function-docstring,line-too-long
+
+import os
+import sys
+import csv
+import re
+import mmap
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+
+INIT_OPTIONS = ('CONFIG_INIT_STACK_NONE',
+                'CONFIG_INIT_STACK_ALL_PATTERN',
+                'CONFIG_INIT_STACK_ALL_ZERO',
+                'CONFIG_INIT_ON_ALLOC_DEFAULT_ON')
+
+# one scan over the raw bytes instead of splitting and stripping every line
+_OPTION_NAMES = rb'|'.join(option.encode('ascii') for option in INIT_OPTIONS)
+_OPTION_PATTERN = re.compile(rb'^(?:(' + _OPTION_NAMES + rb')=y'
+                             rb'|# (' + _OPTION_NAMES + rb') is not set)$',
+                             re.MULTILINE)
+
+def parse_config(config: Path) -> List[str]:
+    set_y = set()
+    not_set = set()
+    # scan the file through mmap: the regex reads straight from the page
+    # cache without copying or decoding the bytes, and the scan still
+    # stops as soon as all options are resolved
+    fd = os.open(config, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if size > 0:
+            with mmap.mmap(fd, size, prot=mmap.PROT_READ) as mm:
+                for m in _OPTION_PATTERN.finditer(mm):
+                    if m.group(1):
+                        set_y.add(m.group(1).decode('ascii'))
+                    else:
+                        not_set.add(m.group(2).decode('ascii'))
+                    if len(set_y | not_set) == len(INIT_OPTIONS):
+                        break
+    finally:
+        os.close(fd)
+
+    row = [config.stem]
+    for option in INIT_OPTIONS:
+        if option in set_y:
+            row.append('y')
+        elif option in not_set:
+            row.append('is not set')
+        else:
+            row.append('absent')
+    return row
+
+
+def main() -> None:
+    parser = ArgumentParser(prog='kconfigs_init_parser',
+                            description='Create a CSV summary of the kernel initialization hardening options in Kconfig files')
+    parser.add_argument('-d', '--directory', default=os.path.dirname(os.path.abspath(__file__)),
+                        help='directory with the Kconfig files to parse')
+    parser.add_argument('-o', '--output', default='kconfigs_init.csv',
+                        help='CSV file for the parsing results')
+    args = parser.parse_args()
+
+    configs = sorted(Path(args.directory).glob('*.config'))
+    if not configs:
+        sys.exit(f'[-] ERROR: no .config files in {args.directory}')
+
+    # parsing is pure CPU work, farm the files out to all cores
+    with ProcessPoolExecutor() as executor:
+        rows = list(executor.map(parse_config, configs, chunksize=32))
+
+    with open(args.output, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name'] + list(INIT_OPTIONS))
+        writer.writerows(rows)
+    print(f'[+] Parsed {len(configs)} Kconfig files, see the results in {args.output}')
+
+
+if __name__ == '__main__':
+    main()
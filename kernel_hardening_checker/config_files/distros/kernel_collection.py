@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+
+"""
+This tool is for checking the security hardening options of the Linux kernel.
+
+SPDX-FileCopyrightText: Alexander Popov <alex.popov@linux.com>
+SPDX-License-Identifier: GPL-3.0-only
+
+This module collects Kconfig files from Google Cloud VM images.
+For each image it boots a short-lived GCE VM that runs a collector script,
+uploads the kernel config to a GCS bucket, and reports completion.
+"""
+
+# pylint: disable=missing-function-docstring,line-too-long
+
+import os
+import sys
+import csv
+import time
+import string
+import shutil
+import configparser
+import queue
+import threading
+from argparse import ArgumentParser
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# the ignores keep the bare-mypy CI run green: the SDK is not installed
+# there, and google.cloud is a namespace package mypy can't see into
+try:
+    import google.auth # type: ignore[import-not-found]
+    from google.auth.exceptions import DefaultCredentialsError # type: ignore[import-not-found]
+    from google.api_core.exceptions import GoogleAPICallError # type: ignore[import-not-found]
+    from google.cloud import compute_v1, storage # type: ignore[import-not-found,attr-defined]
+except ImportError:
+    sys.exit('[-] ERROR: google-cloud-storage and google-cloud-compute are needed for the collection')
+
+
+VM_NAME_PREFIX = 'kconfig-collector-'
+
+# GCE instance names may contain lowercase letters, digits and hyphens;
+# image names are ASCII, so a 128-entry translation table covers them
+_VM_NAME_KEEP = string.ascii_lowercase + string.digits + '-'
+_VM_NAME_TRANS = {i: chr(i) if chr(i) in _VM_NAME_KEEP else '-' for i in range(128)}
+POLL_INTERVAL_MIN = 5 # initial delay before the first VM completion check
+POLL_INTERVAL_MAX = 60 # upper bound for the exponential polling backoff
+DELETE_BATCH_SIZE = 50 # how many VMs the reaper deletes in one go
+BUCKET_POLL_INTERVAL = 15 # seconds between the bucket-wide object listings
+REAPER_INTERVAL = 5 # seconds the reaper thread waits for VMs to delete
+
+# finished VMs are enqueued as (vm_name, zone) for batched deletion,
+# None asks the reaper thread to flush the queue and exit
+_delete_queue: 'queue.Queue[Optional[Tuple[str, str]]]' = queue.Queue()
+DEFAULT_COLLECTOR_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kconfig_collector.sh')
+
+
+def _read_gcloud_ini() -> Optional[str]:
+    # read the project from the gcloud configuration files without spawning gcloud
+    gcloud_dir = os.path.expanduser('~/.config/gcloud')
+    config_name = 'default'
+    active_config = os.path.join(gcloud_dir, 'active_config')
+    if os.path.isfile(active_config):
+        with open(active_config, 'rt', encoding='utf-8') as f:
+            config_name = f.read().strip() or 'default'
+    config_file = os.path.join(gcloud_dir, 'configurations', f'config_{config_name}')
+    if not os.path.isfile(config_file):
+        return None
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(config_file)
+    except configparser.Error:
+        return None
+    return parser.get('core', 'project', fallback=None)
+
+
+@lru_cache(maxsize=1)
+def _storage_client() -> storage.Client:
+    return storage.Client(project=_get_project())
+
+
+@lru_cache(maxsize=1)
+def _instances_client() -> compute_v1.InstancesClient:
+    return compute_v1.InstancesClient()
+
+
+@lru_cache(maxsize=1)
+def _get_project() -> str:
+    for var in ('GOOGLE_CLOUD_PROJECT', 'GCLOUD_PROJECT', 'PROJECT_ID'):
+        project = os.environ.get(var)
+        if project:
+            return project
+    project = _read_gcloud_ini()
+    if project:
+        return project
+    # the slow path: ask the client library itself
+    try:
+        _, project = google.auth.default()
+    except DefaultCredentialsError:
+        sys.exit('[-] ERROR: no Google Cloud credentials, try `gcloud auth application-default login`')
+    if not project:
+        sys.exit('[-] ERROR: no Google Cloud project is configured')
+    return project
+
+
+@lru_cache(maxsize=None)
+def ensure_gcs_bucket(bucket_name: str) -> None:
+    client = _storage_client()
+    # lookup_bucket returns None for a missing bucket in one GET round trip,
+    # without the exception machinery of get_bucket
+    bucket = client.lookup_bucket(bucket_name)
+    if bucket is None:
+        print(f'[+] Creating GCS bucket gs://{bucket_name}')
+        bucket = client.create_bucket(bucket_name)
+
+    # collected files are temporary, drop them after a month
+    bucket.lifecycle_rules = [{'action': {'type': 'Delete'}, 'condition': {'age': 30}}]
+    bucket.patch()
+
+
+def _vm_reaper() -> None:
+    while True:
+        try:
+            item = _delete_queue.get(timeout=REAPER_INTERVAL)
+        except queue.Empty:
+            continue
+        shutdown = False
+        batch: List[Tuple[str, str]] = []
+        while True:
+            if item is None:
+                shutdown = True
+                break
+            batch.append(item)
+            if len(batch) == DELETE_BATCH_SIZE:
+                break
+            try:
+                item = _delete_queue.get_nowait()
+            except queue.Empty:
+                break
+        # the shared client reuses one authorized connection for the batch
+        for vm_name, zone in batch:
+            try:
+                _instances_client().delete(project=_get_project(), zone=zone, instance=vm_name)
+            except GoogleAPICallError as e:
+                print(f'[!] WARNING: deleting VM {vm_name} failed: {e}')
+        if shutdown:
+            return
+
+
+class BucketPoller:
+    """
+    A background thread that lists the whole GCS bucket periodically, so
+    the per-VM completion checks become dictionary lookups instead of one
+    GCS request per VM per poll.
+    """
+    def __init__(self, bucket_name: str) -> None:
+        self.bucket_name = bucket_name
+        self._objects: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # daemon as a backstop: an unnoticed shutdown path must not keep
+        # the whole process alive
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _poll(self) -> None:
+        while not self._stop.is_set():
+            self._refresh()
+            self._stop.wait(BUCKET_POLL_INTERVAL)
+
+    def _refresh(self) -> None:
+        objects: Dict[str, Set[str]] = {}
+        try:
+            for blob in _storage_client().list_blobs(self.bucket_name):
+                parts = blob.name.split('/')
+                if len(parts) == 2:
+                    objects.setdefault(parts[0], set()).add(parts[1])
+        except GoogleAPICallError as e:
+            print(f'[!] WARNING: listing gs://{self.bucket_name} failed: {e}')
+            return
+        with self._lock:
+            self._objects = objects
+
+    def has_objects(self, image_name: str, object_names: Tuple[str, ...]) -> bool:
+        with self._lock:
+            uploaded = self._objects.get(image_name, set())
+        return all(name in uploaded for name in object_names)
+
+
+def check_vm_completion(vm_name: str, zone: str, poller: BucketPoller,
+                        image_name: str, expected_objects: Tuple[str, ...]) -> bool:
+    try:
+        instance = _instances_client().get(project=_get_project(), zone=zone, instance=vm_name)
+    except GoogleAPICallError:
+        return False
+    status = next((item.value for item in instance.metadata.items
+                   if item.key == 'completion-status'), None)
+    if status != 'success':
+        return False
+    return poller.has_objects(image_name, expected_objects)
+
+
+def create_vm(image_project: str, image_name: str, zone: str, bucket_name: str,
+              poller: BucketPoller, collector_script: str, timeout: int) -> bool:
+    vm_name = (VM_NAME_PREFIX + image_name.lower()).translate(_VM_NAME_TRANS)
+    vm_name = vm_name[:63].rstrip('-') # GCE limits the instance name length
+
+    with open(collector_script, 'rt', encoding='utf-8') as f:
+        startup_script = f.read()
+    instance = compute_v1.Instance(
+        name=vm_name,
+        machine_type=f'zones/{zone}/machineTypes/e2-small',
+        disks=[compute_v1.AttachedDisk(
+            boot=True,
+            auto_delete=True,
+            initialize_params=compute_v1.AttachedDiskInitializeParams(
+                source_image=f'projects/{image_project}/global/images/{image_name}'))],
+        network_interfaces=[compute_v1.NetworkInterface(
+            access_configs=[compute_v1.AccessConfig()])],
+        metadata=compute_v1.Metadata(items=[
+            compute_v1.Items(key='bucket-name', value=bucket_name),
+            compute_v1.Items(key='image-name', value=image_name),
+            compute_v1.Items(key='startup-script', value=startup_script)]),
+        service_accounts=[compute_v1.ServiceAccount(
+            email='default',
+            scopes=['https://www.googleapis.com/auth/devstorage.read_write',
+                    'https://www.googleapis.com/auth/compute'])])
+
+    print(f'[+] Creating VM {vm_name} from the image {image_project}/{image_name}')
+    try:
+        operation = _instances_client().insert(project=_get_project(), zone=zone,
+                                               instance_resource=instance)
+        operation.result()
+        # poll with exponential backoff: most VMs finish within a few minutes,
+        # so start checking early and slow down for the long-running ones
+        success = False
+        poll_interval = POLL_INTERVAL_MIN
+        # the expected object names do not change between the polls
+        expected_objects = (f'{image_name}.config', 'system_info.txt')
+        start_time = time.time()
+        while True:
+            if time.time() - start_time > timeout:
+                print(f'[!] WARNING: VM {vm_name} timed out after {timeout} seconds')
+                break
+            time.sleep(min(poll_interval, max(0, timeout - (time.time() - start_time))))
+            poll_interval = min(poll_interval * 2, POLL_INTERVAL_MAX)
+            if check_vm_completion(vm_name, zone, poller, image_name, expected_objects):
+                print(f'[+] VM {vm_name} is finished, kconfig of {image_name} is collected')
+                success = True
+                break
+        _delete_queue.put((vm_name, zone))
+        return success
+    except GoogleAPICallError as e:
+        print(f'[!] WARNING: collecting from {image_name} failed: {e}')
+        _delete_queue.put((vm_name, zone))
+        return False
+
+
+def image_iter(csv_file: str) -> Iterator[Tuple[str, str]]:
+    with open(csv_file, 'rt', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            yield row['image_project'], row['image_name']
+
+
+def process_images(csv_file: str, zone: str, bucket_name: str,
+                   collector_script: str, max_concurrent: int, timeout: int) -> None:
+    print(f'[+] Going to collect kconfigs from the images listed in {csv_file}')
+    poller = BucketPoller(bucket_name)
+    poller.start()
+    reaper = threading.Thread(target=_vm_reaper, daemon=True)
+    reaper.start()
+    ok_count = 0
+    fail_count = 0
+    # the CSV is streamed, so the first VM starts right away; the semaphore
+    # keeps the executor queue short instead of buffering all images at once
+    submit_slots = threading.Semaphore(max_concurrent * 2)
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+            futures: Dict[Future[bool], str] = {}
+            for image_project, image_name in image_iter(csv_file):
+                submit_slots.acquire()
+                future = executor.submit(create_vm, image_project, image_name, zone,
+                                         bucket_name, poller, collector_script, timeout)
+                future.add_done_callback(lambda _: submit_slots.release())
+                futures[future] = image_name
+            # reap the results as the VMs finish, not in the submission order
+            for future in as_completed(futures):
+                if future.result():
+                    ok_count += 1
+                else:
+                    fail_count += 1
+                print(f'[+] Progress: {ok_count + fail_count} of {len(futures)} images are processed')
+    finally:
+        # shut the helper threads down even if a worker or the CSV iteration
+        # raises, otherwise the process would hang on the live threads
+        poller.stop()
+        _delete_queue.put(None) # flush the remaining deletions and stop the reaper
+        reaper.join()
+    print(f'[+] Collection is finished: \'OK\' - {ok_count} / \'FAIL\' - {fail_count}')
+
+
+def main() -> None:
+    parser = ArgumentParser(prog='kernel_collection',
+                            description='Collect Kconfig files from Google Cloud VM images')
+    parser.add_argument('-c', '--csv', required=True,
+                        help='CSV file with image_project,image_name columns')
+    parser.add_argument('-b', '--bucket', required=True,
+                        help='GCS bucket for the collected files')
+    parser.add_argument('-z', '--zone', default='us-central1-a',
+                        help='GCE zone for the collection VMs')
+    parser.add_argument('-s', '--script', default=DEFAULT_COLLECTOR_SCRIPT,
+                        help='startup script performing the collection inside the VM')
+    parser.add_argument('-m', '--max-concurrent', type=int, default=8,
+                        help='number of VMs running at the same time')
+    parser.add_argument('-t', '--timeout', type=int, default=1800,
+                        help='per-VM completion timeout in seconds')
+    args = parser.parse_args()
+
+    if shutil.which('gcloud') is None:
+        # the client libraries do not need gcloud, but its absence usually
+        # means the application default credentials are not set up either
+        print('[!] WARNING: gcloud is not found, check that the application default credentials are configured')
+
+    if not os.path.isfile(args.csv):
+        sys.exit(f'[-] ERROR: no CSV file {args.csv}')
+    if not os.path.isfile(args.script):
+        sys.exit(f'[-] ERROR: no collector script {args.script}')
+
+    print(f'[+] Using the Google Cloud project {_get_project()}')
+    try:
+        ensure_gcs_bucket(args.bucket)
+    except (GoogleAPICallError, DefaultCredentialsError) as e:
+        sys.exit(f'[-] ERROR: preparing the bucket gs://{args.bucket} failed: {e}')
+    process_images(args.csv, args.zone, args.bucket, args.script, args.max_concurrent, args.timeout)
+
+
+if __name__ == '__main__':
+    main()